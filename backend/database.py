@@ -1,4 +1,7 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from types import SimpleNamespace
 import os
 from dotenv import load_dotenv
 
@@ -7,24 +10,88 @@ load_dotenv()
 # MongoDB connection
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "hrms_lite")
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+
+# Redis cache (optional - caching is disabled when REDIS_URL is not set)
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "60"))
+# Seconds to wait on Redis before falling back to MongoDB
+REDIS_TIMEOUT = float(os.getenv("REDIS_TIMEOUT", "0.5"))
 
 client = None
 db = None
+cache = None
+
+# Collection handles, bound once in connect_to_mongo
+collections = SimpleNamespace(employees=None, attendances=None)
 
 async def connect_to_mongo():
     """Connect to MongoDB"""
     global client, db
-    client = AsyncIOMotorClient(MONGO_URI)
+    client = AsyncMongoClient(
+        MONGO_URI,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxPoolSize=MONGO_MAX_POOL_SIZE
+    )
     db = client[DATABASE_NAME]
+    collections.employees = db.employees
+    collections.attendances = db.attendances
+    # Ping so the handshake and auth happen now instead of on the first request
+    await client.admin.command("ping")
+    await create_indexes()
     print("✅ Connected to MongoDB")
 
+async def create_indexes():
+    """Create indexes for the hot query paths"""
+    await db.employees.create_index("employee_id", unique=True)
+    await db.employees.create_index("email", unique=True)
+    # Serves the newest-first paginated employee list
+    await db.employees.create_index([("created_at", -1), ("_id", -1)])
+    await db.attendances.create_index([("employee_id", 1), ("date", 1)], unique=True)
+    # Serves the date range filter and newest-first sort in get_attendance
+    await db.attendances.create_index([("date", -1), ("_id", -1)])
+    # Covers the monthly summary's date match and employee/status group
+    await db.attendances.create_index([("date", 1), ("employee_id", 1), ("status", 1)])
+
+async def connect_to_redis():
+    """Connect to Redis if configured"""
+    global cache
+    if not REDIS_URL:
+        return
+    cache = Redis.from_url(
+        REDIS_URL,
+        socket_connect_timeout=REDIS_TIMEOUT,
+        socket_timeout=REDIS_TIMEOUT
+    )
+    try:
+        await cache.ping()
+    except RedisError as e:
+        # Leave caching disabled rather than stall requests on an unreachable Redis
+        await cache.aclose()
+        cache = None
+        print(f"⚠️ Redis unavailable, caching disabled: {e}")
+        return
+    print("✅ Connected to Redis")
+
+async def close_redis_connection():
+    """Close Redis connection"""
+    global cache
+    if cache:
+        await cache.aclose()
+        print("❌ Disconnected from Redis")
+
 async def close_mongo_connection():
     """Close MongoDB connection"""
     global client
     if client:
-        client.close()
+        await client.close()
         print("❌ Disconnected from MongoDB")
 
 def get_database():
     """Get database instance"""
-    return db
\ No newline at end of file
+    return db
+
+def get_cache():
+    """Get Redis cache instance (None when caching is disabled)"""
+    return cache
\ No newline at end of file
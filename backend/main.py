@@ -1,22 +1,87 @@
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from typing import Optional
-from datetime import datetime
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from typing import List, Optional
+import asyncio
+import logging
+from datetime import datetime, date, time, timedelta
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import WriteConcern
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from redis.exceptions import RedisError
+import orjson
 
-from database import connect_to_mongo, close_mongo_connection, get_database
+from database import (
+    connect_to_mongo, close_mongo_connection, collections,
+    connect_to_redis, close_redis_connection, get_cache, CACHE_TTL
+)
 from models import (
     EmployeeCreate, AttendanceCreate
 )
 
+def dumps(content):
+    """Serialize to JSON bytes; ObjectId becomes str and naive datetimes are UTC"""
+    return orjson.dumps(content, default=str, option=orjson.OPT_NAIVE_UTC)
+
+class MongoJSONResponse(ORJSONResponse):
+    """ORJSONResponse that can render raw MongoDB documents"""
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+class ServerErrorMiddleware:
+    """Return unexpected errors as a JSON 500 response.
+    
+    Added before CORSMiddleware so it runs inside it and the error still
+    carries CORS headers (an Exception handler would run outside CORS).
+    """
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        response_started = False
+        
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            if response_started:
+                raise
+            logging.getLogger("uvicorn.error").exception("Unhandled error")
+            response = JSONResponse(
+                content={"status": "error", "detail": str(exc)},
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+            await response(scope, receive, send)
+
+# Attendance dates are stored as BSON dates at midnight UTC and returned as "YYYY-MM-DD"
+DATE_STRING = {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}}
+
+# Documents fetched per cursor round-trip / written per response chunk
+STREAM_BATCH_SIZE = 500
+
 # Initialize FastAPI
 app = FastAPI(
+    default_response_class=MongoJSONResponse,
     title="HRMS Lite API",
     description="Simple Employee & Attendance Management System",
     version="1.0.0"
 )
 
+# ========== ERROR HANDLING ==========
+# Must be added before CORSMiddleware: later middleware wraps earlier middleware
+app.add_middleware(ServerErrorMiddleware)
+
 # ========== CORS CONFIGURATION - FIXED ==========
 app.add_middleware(
     CORSMiddleware,
@@ -34,17 +99,23 @@ app.add_middleware(
     max_age=600  # Cache preflight requests for 10 minutes
 )
 
+# ========== RESPONSE COMPRESSION ==========
+# Gzip JSON responses (including streamed attendance lists) larger than 1 KB
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # ========== DATABASE EVENTS ==========
 
 @app.on_event("startup")
 async def startup_event():
     """Connect to database on startup"""
     await connect_to_mongo()
+    await connect_to_redis()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close database connection on shutdown"""
     await close_mongo_connection()
+    await close_redis_connection()
 
 # ========== HELPER FUNCTIONS ==========
 
@@ -54,6 +125,105 @@ def serialize_doc(doc):
         doc["_id"] = str(doc["_id"])
     return doc
 
+async def cache_get(key, field=None):
+    """Read a cached JSON value (or hash field), or None on miss / cache unavailable"""
+    cache = get_cache()
+    if cache is None:
+        return None
+    try:
+        if field is None:
+            value = await cache.get(key)
+        else:
+            value = await cache.hget(key, field)
+    except RedisError:
+        return None
+    return orjson.loads(value) if value else None
+
+async def cache_set(key, value, field=None):
+    """Store a JSON value (or hash field) in the cache with the default TTL"""
+    cache = get_cache()
+    if cache is None:
+        return
+    try:
+        if field is None:
+            await cache.set(key, dumps(value), ex=CACHE_TTL)
+        else:
+            async with cache.pipeline() as pipe:
+                pipe.hset(key, field, dumps(value))
+                pipe.expire(key, CACHE_TTL)
+                await pipe.execute()
+    except RedisError:
+        pass
+
+async def cache_delete(*keys):
+    """Invalidate cached keys"""
+    cache = get_cache()
+    if cache is None:
+        return
+    try:
+        await cache.delete(*keys)
+    except RedisError:
+        pass
+
+async def stream_records(cursor, head, first_batch=()):
+    """Stream {**head, "data": [...], "count": n} while the cursor is being read"""
+    async def documents():
+        for doc in first_batch:
+            yield doc
+        async for doc in cursor:
+            yield doc
+    
+    yield dumps(head)[:-1] + b',"data":['
+    count = 0
+    chunk = []
+    async for doc in documents():
+        chunk.append(dumps(doc))
+        count += 1
+        if len(chunk) >= STREAM_BATCH_SIZE:
+            yield (b"," if count > len(chunk) else b"") + b",".join(chunk)
+            chunk = []
+    if chunk:
+        yield (b"," if count > len(chunk) else b"") + b",".join(chunk)
+    yield b'],"count":' + str(count).encode() + b"}"
+
+def records_response(cursor, first_batch=(), **head):
+    """Streaming JSON response for a list of records.
+    
+    Pass a cursor whose query has already run (an awaited aggregate, or the
+    first_batch read from a find cursor) so query errors surface before the
+    200 status is sent.
+    """
+    return StreamingResponse(
+        stream_records(cursor, {"status": "success", **head}, first_batch),
+        media_type="application/json"
+    )
+
+def parse_object_id(value):
+    """Convert a string to ObjectId, raising 400 if it is not a valid ID"""
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid employee ID format"
+        )
+
+async def find_employee(oid, projection=None):
+    """Get an employee document by ObjectId, served from cache when possible.
+    
+    With a projection, a cache miss fetches only those fields and the partial
+    document is not cached.
+    """
+    key = f"emp:{oid}"
+    employee = await cache_get(key)
+    if employee is not None:
+        return employee
+    
+    employee = await collections.employees.find_one({"_id": oid}, projection)
+    if employee and projection is None:
+        await cache_set(key, employee)
+    return employee
+
 # ========== ROOT ENDPOINT ==========
 
 @app.get("/")
@@ -88,341 +258,435 @@ async def preflight_handler(rest_of_path: str):
 # ========== EMPLOYEE APIs ==========
 
 @app.get("/api/employees", response_model=dict)
-async def get_all_employees():
-    """Get all employees"""
-    try:
-        db = get_database()
-        cursor = db.employees.find().sort("created_at", -1)
-        employees = await cursor.to_list(length=None)
-        
-        # Convert ObjectId to string for JSON response
-        for emp in employees:
-            emp["_id"] = str(emp["_id"])
-            if "created_at" in emp:
-                emp["created_at"] = emp["created_at"].strftime("%Y-%m-%d %H:%M:%S")
-        
-        return {
-            "status": "success",
-            "data": employees,
-            "count": len(employees)
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+async def get_all_employees(
+    limit: int = Query(50, ge=1, le=1000),
+    skip: int = Query(0, ge=0)
+):
+    """Get a page of employees (newest first)"""
+    # Pages are cached as fields of the emp:all hash so one delete invalidates them all
+    page_key = f"{skip}:{limit}"
+    page = await cache_get("emp:all", page_key)
+    
+    if page is None:
+        cursor = collections.employees.find().sort([("created_at", -1), ("_id", -1)]).skip(skip).limit(limit)
+        employees, total = await asyncio.gather(
+            cursor.to_list(length=None),
+            collections.employees.estimated_document_count()
         )
+        page = {"data": employees, "total": total}
+        await cache_set("emp:all", page, page_key)
+    
+    return MongoJSONResponse({
+        "status": "success",
+        "data": page["data"],
+        "count": len(page["data"]),
+        "total": page["total"],
+        "skip": skip,
+        "limit": limit
+    })
 
 @app.post("/api/employees", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def add_employee(employee: EmployeeCreate):
     """Add a new employee"""
+    # Create new employee
+    new_employee = {
+        "employee_id": employee.employee_id,
+        "full_name": employee.full_name,
+        "email": employee.email,
+        "department": employee.department,
+        "created_at": datetime.utcnow()
+    }
+    
+    # Unique indexes on employee_id and email reject duplicates
     try:
-        db = get_database()
-        
-        # Check if employee_id already exists
-        existing_emp = await db.employees.find_one({"employee_id": employee.employee_id})
-        if existing_emp:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Employee ID '{employee.employee_id}' already exists"
-            )
-        
-        # Check if email already exists
-        existing_email = await db.employees.find_one({"email": employee.email})
-        if existing_email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Email '{employee.email}' is already registered"
-            )
-        
-        # Create new employee
-        new_employee = {
-            "employee_id": employee.employee_id,
-            "full_name": employee.full_name,
-            "email": employee.email,
-            "department": employee.department,
-            "created_at": datetime.utcnow()
-        }
-        
-        result = await db.employees.insert_one(new_employee)
-        created_employee = await db.employees.find_one({"_id": result.inserted_id})
-        
-        # Format for response
-        created_employee["_id"] = str(created_employee["_id"])
-        created_employee["created_at"] = created_employee["created_at"].strftime("%Y-%m-%d %H:%M:%S")
-        
-        return {
-            "status": "success",
-            "message": "Employee added successfully",
-            "data": created_employee
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
+        result = await collections.employees.insert_one(new_employee)
+    except DuplicateKeyError as e:
+        key_pattern = (e.details or {}).get("keyPattern", {})
+        if "email" in key_pattern:
+            detail = f"Email '{employee.email}' is already registered"
+        else:
+            detail = f"Employee ID '{employee.employee_id}' already exists"
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail
         )
+    
+    new_employee["_id"] = result.inserted_id
+    
+    await cache_delete("emp:all")
+    
+    return MongoJSONResponse({
+        "status": "success",
+        "message": "Employee added successfully",
+        "data": new_employee
+    }, status_code=status.HTTP_201_CREATED)
 
 @app.get("/api/employees/{employee_id}", response_model=dict)
 async def get_employee(employee_id: str):
     """Get a single employee by ID"""
-    try:
-        db = get_database()
-        
-        if not ObjectId.is_valid(employee_id):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid employee ID format"
-            )
-        
-        employee = await db.employees.find_one({"_id": ObjectId(employee_id)})
-        
-        if not employee:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Employee with ID {employee_id} not found"
-            )
-        
-        # Format for response
-        employee["_id"] = str(employee["_id"])
-        employee["created_at"] = employee["created_at"].strftime("%Y-%m-%d %H:%M:%S")
-        
-        return {
-            "status": "success",
-            "data": employee
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
+    oid = parse_object_id(employee_id)
+    
+    employee = await find_employee(oid)
+    
+    if not employee:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Employee with ID {employee_id} not found"
         )
+    
+    return MongoJSONResponse({
+        "status": "success",
+        "data": employee
+    })
 
 @app.delete("/api/employees/{employee_id}", response_model=dict)
 async def delete_employee(employee_id: str):
     """Delete an employee by ID"""
-    try:
-        db = get_database()
-        
-        if not ObjectId.is_valid(employee_id):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid employee ID format"
-            )
-        
-        # Find the employee
-        employee = await db.employees.find_one({"_id": ObjectId(employee_id)})
-        
-        if not employee:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Employee with ID {employee_id} not found"
-            )
-        
-        # Delete employee
-        await db.employees.delete_one({"_id": ObjectId(employee_id)})
-        
-        # Delete all attendance records for this employee
-        await db.attendances.delete_many({"employee_id": employee_id})
-        
-        return {
-            "status": "success",
-            "message": f"Employee {employee['full_name']} deleted successfully"
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
+    oid = parse_object_id(employee_id)
+    
+    # Delete employee and their attendance records concurrently
+    employee, _ = await asyncio.gather(
+        collections.employees.find_one_and_delete(
+            {"_id": oid},
+            projection={"full_name": 1}
+        ),
+        collections.attendances.delete_many({"employee_id": employee_id})
+    )
+    
+    if not employee:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Employee with ID {employee_id} not found"
         )
+    
+    await cache_delete("emp:all", f"emp:{oid}")
+    
+    return {
+        "status": "success",
+        "message": f"Employee {employee['full_name']} deleted successfully"
+    }
 
 # ========== ATTENDANCE APIs ==========
 
 @app.post("/api/attendance", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def mark_attendance(attendance: AttendanceCreate):
     """Mark attendance for an employee"""
-    try:
-        db = get_database()
-        
-        # Check if employee exists
-        if not ObjectId.is_valid(attendance.employee_id):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid employee ID format"
-            )
-        
-        employee = await db.employees.find_one({"_id": ObjectId(attendance.employee_id)})
-        
-        if not employee:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Employee with ID {attendance.employee_id} not found"
-            )
-        
-        # Validate status
-        if attendance.status not in ["Present", "Absent"]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail='Status must be either "Present" or "Absent"'
-            )
-        
-        # Check if attendance already marked for this date
-        date_str = attendance.date.strftime("%Y-%m-%d")
-        existing = await db.attendances.find_one({
-            "employee_id": attendance.employee_id,
-            "date": date_str
-        })
-        
-        if existing:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Attendance already marked for {employee['full_name']} on {date_str}"
+    oid = parse_object_id(attendance.employee_id)
+    
+    # Validate status
+    if attendance.status not in ["Present", "Absent"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Status must be either "Present" or "Absent"'
+        )
+    
+    date_str = attendance.date.isoformat()
+    new_attendance = {
+        "employee_id": attendance.employee_id,
+        "date": datetime.combine(attendance.date, time.min),
+        "status": attendance.status,
+        "marked_at": datetime.utcnow()
+    }
+    
+    async def upsert_attendance():
+        """Insert the record unless one exists for that day; returns the new _id or None"""
+        try:
+            result = await collections.attendances.update_one(
+                {"employee_id": new_attendance["employee_id"], "date": new_attendance["date"]},
+                {"$setOnInsert": {
+                    "status": new_attendance["status"],
+                    "marked_at": new_attendance["marked_at"]
+                }},
+                upsert=True
             )
-        
-        # Create attendance record
-        new_attendance = {
-            "employee_id": attendance.employee_id,
-            "date": date_str,
-            "status": attendance.status,
-            "marked_at": datetime.utcnow()
-        }
-        
-        result = await db.attendances.insert_one(new_attendance)
-        created = await db.attendances.find_one({"_id": result.inserted_id})
-        
-        # Format for response
-        created["_id"] = str(created["_id"])
-        created["marked_at"] = created["marked_at"].strftime("%Y-%m-%d %H:%M:%S")
-        created["employee_name"] = employee["full_name"]
-        
-        return {
-            "status": "success",
-            "message": f"Attendance marked for {employee['full_name']}",
-            "data": created
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
+        except DuplicateKeyError:
+            # A concurrent request inserted the same (employee_id, date) first
+            return None
+        return result.upserted_id
+    
+    # Look up the employee while upserting; the unique (employee_id, date)
+    # index makes the upsert the single source of truth for duplicates
+    employee, upserted_id = await asyncio.gather(
+        find_employee(oid, {"full_name": 1}),
+        upsert_attendance()
+    )
+    
+    if not employee:
+        if upserted_id is not None:
+            await collections.attendances.delete_one({"_id": upserted_id})
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Employee with ID {attendance.employee_id} not found"
         )
+    
+    if upserted_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Attendance already marked for {employee['full_name']} on {date_str}"
+        )
+    
+    created = {
+        **new_attendance,
+        "_id": upserted_id,
+        "date": date_str,
+        "employee_name": employee["full_name"]
+    }
+    
+    return MongoJSONResponse({
+        "status": "success",
+        "message": f"Attendance marked for {employee['full_name']}",
+        "data": created
+    }, status_code=status.HTTP_201_CREATED)
+
+@app.post("/api/attendance/bulk", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def mark_attendance_bulk(items: List[AttendanceCreate]):
+    """Mark attendance for many employees in one request (e.g. a day's spreadsheet)"""
+    if not items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No attendance records provided"
+        )
+    
+    errors = []
+    oids = {}
+    for index, item in enumerate(items):
+        try:
+            oids[index] = ObjectId(item.employee_id)
+        except (InvalidId, TypeError):
+            errors.append({"index": index, "detail": "Invalid employee ID format"})
+    
+    # Check all referenced employees exist with a single query
+    existing = set()
+    if oids:
+        cursor = collections.employees.find({"_id": {"$in": list(set(oids.values()))}}, {"_id": 1})
+        existing = {emp["_id"] for emp in await cursor.to_list(length=None)}
+    
+    # Build documents, remembering which input row each one came from
+    docs = []
+    rows = []
+    marked_at = datetime.utcnow()
+    for index, oid in oids.items():
+        item = items[index]
+        if oid not in existing:
+            errors.append({"index": index, "detail": f"Employee with ID {item.employee_id} not found"})
+            continue
+        docs.append({
+            "employee_id": item.employee_id,
+            "date": datetime.combine(item.date, time.min),
+            "status": item.status,
+            "marked_at": marked_at
+        })
+        rows.append(index)
+    
+    # Attendance is low-criticality: acknowledge from the primary only and skip
+    # schema validation; the unique (employee_id, date) index still rejects duplicates
+    inserted = 0
+    if docs:
+        attendances = collections.attendances.with_options(write_concern=WriteConcern(w=1))
+        try:
+            result = await attendances.insert_many(docs, ordered=False, bypass_document_validation=True)
+            inserted = len(result.inserted_ids)
+        except BulkWriteError as e:
+            inserted = e.details.get("nInserted", 0)
+            for error in e.details.get("writeErrors", []):
+                index = rows[error["index"]]
+                if error.get("code") == 11000:
+                    detail = f"Attendance already marked on {items[index].date.isoformat()}"
+                else:
+                    detail = error.get("errmsg", "Write failed")
+                errors.append({"index": index, "detail": detail})
+    
+    errors.sort(key=lambda error: error["index"])
+    
+    # 201 when every row was inserted, 200 for partial success, 400 when nothing was
+    if not errors:
+        result_status, status_code = "success", status.HTTP_201_CREATED
+    elif inserted:
+        result_status, status_code = "partial", status.HTTP_200_OK
+    else:
+        result_status, status_code = "error", status.HTTP_400_BAD_REQUEST
+    
+    return MongoJSONResponse({
+        "status": result_status,
+        "message": f"Attendance marked for {inserted} of {len(items)} records",
+        "inserted": inserted,
+        "errors": errors
+    }, status_code=status_code)
 
 @app.get("/api/attendance", response_model=dict)
-async def get_attendance(date: Optional[str] = None):
-    """Get attendance records (optionally filtered by date)"""
+async def get_attendance(
+    on: Optional[date] = Query(None, alias="date"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    skip: int = Query(0, ge=0)
+):
+    """Get attendance records (optionally filtered by date or start/end range, paginated with skip/limit)"""
+    # Build query
+    if on:
+        start = end = on
+    date_range = {}
+    if start:
+        date_range["$gte"] = datetime.combine(start, time.min)
+    # date.max has no next day to bound by; every stored date is <= it anyway
+    if end and end < date.max:
+        date_range["$lt"] = datetime.combine(end + timedelta(days=1), time.min)
+    query = {"date": date_range} if date_range else {}
+    
+    # Join employee details server-side with a single aggregation
+    # (_id breaks ties between same-day records so skip/limit pages are stable)
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"date": -1, "_id": -1}}
+    ]
+    if skip:
+        pipeline.append({"$skip": skip})
+    if limit:
+        pipeline.append({"$limit": limit})
+    pipeline += [
+        {"$addFields": {
+            "emp_oid": {
+                "$convert": {"input": "$employee_id", "to": "objectId", "onError": None, "onNull": None}
+            }
+        }},
+        {"$lookup": {
+            "from": "employees",
+            "localField": "emp_oid",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"full_name": 1, "employee_id": 1, "department": 1}}],
+            "as": "emp"
+        }},
+        {"$unwind": {"path": "$emp", "preserveNullAndEmptyArrays": True}},
+        {"$project": {
+            "employee_id": 1,
+            "employee_name": {"$ifNull": ["$emp.full_name", "Unknown"]},
+            "employee_details": {
+                "employee_id": {"$ifNull": ["$emp.employee_id", "N/A"]},
+                "department": {"$ifNull": ["$emp.department", "N/A"]}
+            },
+            "date": DATE_STRING,
+            "status": 1,
+            "marked_at": 1
+        }}
+    ]
+    cursor = await collections.attendances.aggregate(pipeline, batchSize=STREAM_BATCH_SIZE)
+    
+    return records_response(cursor)
+
+@app.get("/api/attendance/summary", response_model=dict)
+async def get_attendance_summary(
+    month: str = Query(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$", examples=["2025-01"])
+):
+    """Get present/absent day counts per employee for a month (YYYY-MM)"""
     try:
-        db = get_database()
-        
-        # Build query
-        query = {}
-        if date:
-            query["date"] = date
-        
-        # Get attendance records
-        cursor = db.attendances.find(query).sort("date", -1)
-        records = await cursor.to_list(length=None)
-        
-        # Get all employees for reference
-        employees = {}
-        emp_cursor = db.employees.find()
-        async for emp in emp_cursor:
-            employees[str(emp["_id"])] = emp
-        
-        # Format records
-        formatted_records = []
-        for record in records:
-            record["_id"] = str(record["_id"])
-            emp = employees.get(record["employee_id"], {})
-            formatted_records.append({
-                "_id": record["_id"],
-                "employee_id": record["employee_id"],
-                "employee_name": emp.get("full_name", "Unknown"),
-                "employee_details": {
-                    "employee_id": emp.get("employee_id", "N/A"),
-                    "department": emp.get("department", "N/A")
-                },
-                "date": record["date"],
-                "status": record["status"],
-                "marked_at": record["marked_at"].strftime("%Y-%m-%d %H:%M:%S") if isinstance(record["marked_at"], datetime) else record["marked_at"]
-            })
-        
-        return {
-            "status": "success",
-            "data": formatted_records,
-            "count": len(formatted_records)
-        }
-        
-    except Exception as e:
+        start = datetime.strptime(month, "%Y-%m")
+        end = (start + timedelta(days=32)).replace(day=1)
+    except (ValueError, OverflowError):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Month '{month}' is out of range"
         )
+    
+    # Count server-side; the (date, employee_id, status) index covers the match and group
+    pipeline = [
+        {"$match": {"date": {"$gte": start, "$lt": end}}},
+        {"$project": {"_id": 0, "employee_id": 1, "status": 1}},
+        {"$facet": {
+            "employees": [
+                {"$group": {
+                    "_id": "$employee_id",
+                    "present": {"$sum": {"$cond": [{"$eq": ["$status", "Present"]}, 1, 0]}},
+                    "absent": {"$sum": {"$cond": [{"$eq": ["$status", "Absent"]}, 1, 0]}}
+                }},
+                {"$addFields": {
+                    "emp_oid": {
+                        "$convert": {"input": "$_id", "to": "objectId", "onError": None, "onNull": None}
+                    }
+                }},
+                {"$lookup": {
+                    "from": "employees",
+                    "localField": "emp_oid",
+                    "foreignField": "_id",
+                    "pipeline": [{"$project": {"full_name": 1, "employee_id": 1, "department": 1}}],
+                    "as": "emp"
+                }},
+                {"$unwind": {"path": "$emp", "preserveNullAndEmptyArrays": True}},
+                {"$project": {
+                    "_id": 0,
+                    "employee_id": "$_id",
+                    "employee_name": {"$ifNull": ["$emp.full_name", "Unknown"]},
+                    "employee_details": {
+                        "employee_id": {"$ifNull": ["$emp.employee_id", "N/A"]},
+                        "department": {"$ifNull": ["$emp.department", "N/A"]}
+                    },
+                    "present": 1,
+                    "absent": 1
+                }},
+                {"$sort": {"employee_name": 1}}
+            ],
+            "totals": [
+                {"$group": {"_id": "$status", "n": {"$sum": 1}}}
+            ]
+        }}
+    ]
+    cursor = await collections.attendances.aggregate(pipeline)
+    result = (await cursor.to_list(length=None))[0]
+    totals = {row["_id"]: row["n"] for row in result["totals"]}
+    
+    return MongoJSONResponse({
+        "status": "success",
+        "month": month,
+        "totals": {
+            "present": totals.get("Present", 0),
+            "absent": totals.get("Absent", 0)
+        },
+        "data": result["employees"],
+        "count": len(result["employees"])
+    })
 
 @app.get("/api/attendance/employee/{employee_id}", response_model=dict)
-async def get_employee_attendance(employee_id: str):
-    """Get attendance records for a specific employee"""
-    try:
-        db = get_database()
-        
-        if not ObjectId.is_valid(employee_id):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid employee ID format"
-            )
-        
-        # Check if employee exists
-        employee = await db.employees.find_one({"_id": ObjectId(employee_id)})
-        
-        if not employee:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Employee with ID {employee_id} not found"
-            )
-        
-        # Get attendance records
-        cursor = db.attendances.find({"employee_id": employee_id}).sort("date", -1)
-        records = await cursor.to_list(length=None)
-        
-        # Format records
-        formatted_records = []
-        for record in records:
-            record["_id"] = str(record["_id"])
-            formatted_records.append({
-                "_id": record["_id"],
-                "date": record["date"],
-                "status": record["status"],
-                "marked_at": record["marked_at"].strftime("%Y-%m-%d %H:%M:%S") if isinstance(record["marked_at"], datetime) else record["marked_at"]
-            })
-        
-        return {
-            "status": "success",
-            "employee": {
-                "_id": str(employee["_id"]),
-                "employee_id": employee["employee_id"],
-                "full_name": employee["full_name"],
-                "email": employee["email"],
-                "department": employee["department"]
-            },
-            "data": formatted_records,
-            "count": len(formatted_records)
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
+async def get_employee_attendance(
+    employee_id: str,
+    limit: Optional[int] = Query(None, ge=1),
+    skip: int = Query(0, ge=0)
+):
+    """Get attendance records for a specific employee (paginated with skip/limit)"""
+    oid = parse_object_id(employee_id)
+    
+    # Check if employee exists
+    employee = await find_employee(oid)
+    
+    if not employee:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Employee with ID {employee_id} not found"
         )
+    
+    # Get attendance records
+    cursor = collections.attendances.find(
+        {"employee_id": employee_id},
+        {"date": DATE_STRING, "status": 1, "marked_at": 1}
+    ).sort("date", -1).skip(skip).limit(limit or 0).batch_size(STREAM_BATCH_SIZE)
+    # find() is lazy - run the query now so failures become a 500, not a truncated 200
+    first_batch = await cursor.to_list(length=STREAM_BATCH_SIZE)
+    
+    return records_response(cursor, first_batch, employee={
+        "_id": employee["_id"],
+        "employee_id": employee["employee_id"],
+        "full_name": employee["full_name"],
+        "email": employee["email"],
+        "department": employee["department"]
+    })
 
-# Run with: uvicorn main:app --reload
+# Run with: uvicorn main:app --reload (development)
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY") or max(2, os.cpu_count() or 1))
+    )
\ No newline at end of file
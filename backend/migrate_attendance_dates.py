@@ -0,0 +1,26 @@
+"""One-off migration: convert legacy "YYYY-MM-DD" attendance dates to BSON dates.
+
+Runs as the pre-deploy step on Railway and Render (see railway.json /
+render.yaml). To run it by hand:
+    cd backend && python migrate_attendance_dates.py
+
+Safe to re-run - already migrated records are skipped.
+"""
+import asyncio
+
+import database
+
+async def migrate_attendance_dates():
+    """Convert legacy "YYYY-MM-DD" attendance dates to BSON dates"""
+    await database.connect_to_mongo()
+    try:
+        result = await database.collections.attendances.update_many(
+            {"date": {"$type": "string"}},
+            [{"$set": {"date": {"$dateFromString": {"dateString": "$date", "format": "%Y-%m-%d"}}}}]
+        )
+        print(f"🔄 Migrated {result.modified_count} attendance dates")
+    finally:
+        await database.close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(migrate_attendance_dates())
@@ -1,23 +1,15 @@
-from pydantic import BaseModel, Field, EmailStr, validator
-from typing import Optional, List
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, EmailStr, field_validator
+from typing import Annotated, Optional, List
 from datetime import datetime, date
 from bson import ObjectId
 
 # Helper for ObjectId serialization
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid objectid")
-        return ObjectId(v)
+def _to_oid_str(v):
+    if not ObjectId.is_valid(v):
+        raise ValueError("Invalid objectid")
+    return str(ObjectId(v))
 
-    @classmethod
-    def __get_pydantic_json_schema__(cls, field_schema):
-        field_schema.update(type="string")
+PyObjectId = Annotated[str, BeforeValidator(_to_oid_str)]
 
 # ========== EMPLOYEE MODELS ==========
 
@@ -34,10 +26,8 @@ class EmployeeInDB(EmployeeBase):
     id: Optional[PyObjectId] = Field(alias="_id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
-    class Config:
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "employee_id": "EMP001",
                 "full_name": "John Doe",
@@ -45,15 +35,17 @@ class EmployeeInDB(EmployeeBase):
                 "department": "Engineering"
             }
         }
+    )
 
 class EmployeeResponse(EmployeeBase):
     id: str = Field(alias="_id")
     created_at: str
     
-    @validator("created_at", pre=True)
+    @field_validator("created_at", mode="before")
+    @classmethod
     def format_date(cls, v):
         if isinstance(v, datetime):
-            return v.strftime("%Y-%m-%d %H:%M:%S")
+            return v.isoformat(sep=" ", timespec="seconds")
         return v
 
 # ========== ATTENDANCE MODELS ==========
@@ -69,10 +61,6 @@ class AttendanceCreate(AttendanceBase):
 class AttendanceInDB(AttendanceBase):
     id: Optional[PyObjectId] = Field(alias="_id")
     marked_at: datetime = Field(default_factory=datetime.utcnow)
-    
-    class Config:
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
 
 class AttendanceResponse(AttendanceBase):
     id: str = Field(alias="_id")
@@ -80,14 +68,16 @@ class AttendanceResponse(AttendanceBase):
     employee_details: Optional[dict] = None
     marked_at: str
     
-    @validator("marked_at", pre=True)
+    @field_validator("marked_at", mode="before")
+    @classmethod
     def format_marked_at(cls, v):
         if isinstance(v, datetime):
-            return v.strftime("%Y-%m-%d %H:%M:%S")
+            return v.isoformat(sep=" ", timespec="seconds")
         return v
     
-    @validator("date", pre=True)
+    @field_validator("date", mode="before")
+    @classmethod
     def format_date(cls, v):
         if isinstance(v, date):
-            return v.strftime("%Y-%m-%d")
+            return v.isoformat()
         return v
\ No newline at end of file